@@ -0,0 +1,107 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import product
+from typing import Callable, Dict, Final, List, Optional
+import numpy as np
+from constants import (
+    IMAGE_SIZE, SWEEP_NUM_ANGLES, SWEEP_ANGULAR_RANGES, SWEEP_PHOTON_COUNTS
+)
+from synthetic_data import simulate_acquisition
+from radon_transform import (
+    filtered_back_projection, simple_back_projection, tv_reconstruction, prepare_tv_operator
+)
+from metrics import calculate_metrics
+
+###################################################################################
+
+
+def _tv_engine(sinogram: np.ndarray, theta: np.ndarray, size: int) -> np.ndarray:
+    return tv_reconstruction(sinogram, theta, size)[0]
+
+
+# Every reconstruction engine benchmarked by the sweep: (sinogram, theta, size) -> image
+RECONSTRUCTION_ENGINES: Final[Dict[str, Callable[..., np.ndarray]]] = {
+    "fbp_library": partial(filtered_back_projection, use_library=True),
+    "fbp_custom": partial(filtered_back_projection, use_library=False),
+    "bp_library": partial(simple_back_projection, use_library=True),
+    "bp_custom": partial(simple_back_projection, use_library=False),
+    "tv": _tv_engine,
+}
+
+# One-off per-geometry preparation, timed apart from the reconstruction itself
+ENGINE_SETUP: Final[Dict[str, Callable[..., None]]] = {
+    "tv": lambda sinogram, theta, size: prepare_tv_operator(theta, size, sinogram.shape[0]),
+}
+
+###################################################################################
+
+
+def _run_sweep_point(phantom: np.ndarray, num_angles: int, angular_range: float,
+                     photon_count: Optional[float], seed: int) -> List[dict]:
+    """Simulate one acquisition setting and reconstruct it with every engine"""
+    sinogram, theta = simulate_acquisition(
+        phantom, num_angles, angular_range, photon_count, seed=seed)
+
+    rows = []
+    for engine, reconstruct in RECONSTRUCTION_ENGINES.items():
+        start = time.perf_counter()
+        if engine in ENGINE_SETUP:
+            ENGINE_SETUP[engine](sinogram, theta, phantom.shape[0])
+        setup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        recon = reconstruct(sinogram, theta, phantom.shape[0])
+        elapsed = time.perf_counter() - start
+
+        _, psnr, ssim = calculate_metrics(phantom, recon)
+        rows.append({
+            "num_angles": num_angles,
+            "angular_range": angular_range,
+            "photon_count": photon_count,
+            "engine": engine,
+            "setup_seconds": setup,
+            "seconds": elapsed,
+            "psnr": psnr,
+            "ssim": ssim,
+        })
+    return rows
+
+
+def run_acquisition_sweep(phantom: np.ndarray,
+                          num_angles_grid: List[int] = SWEEP_NUM_ANGLES,
+                          angular_ranges: List[float] = SWEEP_ANGULAR_RANGES,
+                          photon_counts: List[Optional[float]] = SWEEP_PHOTON_COUNTS,
+                          max_workers: Optional[int] = None,
+                          seed: int = 0) -> List[dict]:
+    """Run the angle count / angular range / dose grid in parallel, one process task per point"""
+    grid = list(product(num_angles_grid, angular_ranges, photon_counts))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_run_sweep_point, phantom, n, r, p, seed + idx)
+            for idx, (n, r, p) in enumerate(grid)
+        ]
+        results = [row for future in futures for row in future.result()]
+
+    return results
+
+
+def print_sweep_table(results: List[dict]) -> None:
+    """Tabulate speed vs. quality of every engine over the sweep (setup = one-off operator build)"""
+    header = (f"{'angles':>6} {'range':>6} {'photons':>8} {'engine':<12} "
+              f"{'setup (s)':>9} {'time (s)':>9} {'PSNR':>7} {'SSIM':>6}")
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        photons = "inf" if row["photon_count"] is None else f"{row['photon_count']:.0e}"
+        print(f"{row['num_angles']:>6} {row['angular_range']:>6.0f} {photons:>8} "
+              f"{row['engine']:<12} {row['setup_seconds']:>9.4f} {row['seconds']:>9.4f} "
+              f"{row['psnr']:>7.2f} {row['ssim']:>6.3f}")
+
+###################################################################################
+
+
+if __name__ == "__main__":
+    from synthetic_data import generate_phantom
+    print_sweep_table(run_acquisition_sweep(generate_phantom(IMAGE_SIZE, seed=0)))
@@ -14,6 +14,7 @@ DOWNLOAD_URLS: Final[str] = [
     f"https://www.visus.com/fileadmin/content/pictures/Downloads/JiveX_DICOME_Viewer/case{i}.zip"
     for i in range(1, 7+1)
 ]
+MANIFEST_FILE: Final[str] = 'manifest.sqlite'  # Per data directory slice index
 
 ###################################################################################
 
@@ -24,6 +25,18 @@ THETA: Final[np.ndarray] = np.linspace(0, 180, 180, endpoint=False)
 NUM_SAMPLES: Final[int] = 5  # Number of synthetic samples
 NOISE_LEVEL: Final[float] = 0.1  # Gaussian noise standard deviation
 
+# Acquisition simulation (projection-domain noise)
+ATTENUATION_SCALE: Final[float] = 0.05  # Attenuation per unit of image intensity per pixel
+SWEEP_NUM_ANGLES: Final[list] = [30, 60, 90, 180]
+SWEEP_ANGULAR_RANGES: Final[list] = [120.0, 150.0, 180.0]
+SWEEP_PHOTON_COUNTS: Final[list] = [None, 1e5, 1e4, 1e3]  # None -> noiseless
+
+# Batch pipeline (bounded queues between read / compute / write stages)
+PIPELINE_READ_DEPTH: Final[int] = 8  # Slices prefetched ahead of compute
+PIPELINE_WRITE_DEPTH: Final[int] = 8  # Sinograms waiting to be written
+PIPELINE_COMPUTE_WORKERS: Final[int] = 2
+PIPELINE_SERIES_CHUNK: Final[int] = 32  # Slices per multi-frame sinogram file, 0 -> one file per slice
+
 # DICOM configuration
 DICOM_METADATA: Final[dict] = {
     "PatientID": "ANONYMOUS",
@@ -32,6 +45,8 @@ DICOM_METADATA: Final[dict] = {
     "BitsAllocated": 16,
     "PixelRepresentation": 0,
 }
+SINOGRAM_COMPRESSION: Final[str] = "deflate"  # "deflate", "rle" or "none"
+SINOGRAM_STORED_MAX: Final[int] = 65535  # Full uint16 range for rescaled sinograms
 
 
 ###################################################################################
@@ -0,0 +1,234 @@
+import os
+import hashlib
+import sqlite3
+from typing import List, Optional, Tuple
+import pydicom
+from constants import MANIFEST_FILE
+
+###################################################################################
+
+_HEADER_TAGS = [
+    "SeriesInstanceUID", "SOPInstanceUID", "InstanceNumber",
+    "ImagePositionPatient", "SliceLocation",
+    "Rows", "Columns", "BitsAllocated", "PixelRepresentation",
+]
+_SKIPPED_DIRS = {"sinograms"}  # Derived outputs written next to the data
+
+_SCHEMA = """
+CREATE TABLE slices (
+    case_id TEXT NOT NULL,
+    series INTEGER NOT NULL,
+    slice INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    series_uid TEXT,
+    instance_uid TEXT,
+    instance_number INTEGER,
+    slice_position REAL,
+    rows INTEGER,
+    columns INTEGER,
+    dtype TEXT,
+    PRIMARY KEY (case_id, series, slice)
+) WITHOUT ROWID
+"""
+_META_SCHEMA = "CREATE TABLE manifest_meta (key TEXT PRIMARY KEY, value TEXT)"
+
+###################################################################################
+
+
+def manifest_path(data_dir: str) -> str:
+    return os.path.join(data_dir, MANIFEST_FILE)
+
+
+def parse_sample_id(sample_id: str) -> Tuple[str, int, int]:
+    """
+    Split a sample ID into case, series and slice index: 'CASE_SLICE' (e.g. 1_008)
+    addresses the case's main series 0, 'CASE_SERIES_SLICE' (e.g. 1_2_008) any other one
+    """
+    parts = sample_id.split("_")
+    if len(parts) >= 3 and parts[-2].isdigit() and parts[-1].isdigit():
+        return "_".join(parts[:-2]), int(parts[-2]), int(parts[-1])
+    if len(parts) >= 2 and parts[-1].isdigit():
+        return "_".join(parts[:-1]), 0, int(parts[-1])
+    raise ValueError(f"Invalid sample ID: {sample_id}")
+
+
+def format_sample_id(case_id: str, series: int, slice_index: int) -> str:
+    if series == 0:
+        return f"{case_id}_{slice_index:03d}"
+    return f"{case_id}_{series}_{slice_index:03d}"
+
+
+def _case_id(relative_dir: str) -> str:
+    """Case key from the top-level directory, e.g. 'case3/series' -> '3'"""
+    top = relative_dir.split(os.sep)[0]
+    return top[len("case"):] if top.startswith("case") else top
+
+
+def _walk_case_files(data_dir: str):
+    """(root, relative_dir, file_name) of every DICOM file inside a case directory"""
+    for root, dirs, files in os.walk(data_dir):
+        dirs[:] = sorted(d for d in dirs if d not in _SKIPPED_DIRS)
+        relative_dir = os.path.relpath(root, data_dir)
+        if relative_dir == os.curdir:
+            continue  # Only files inside a case directory are slices
+        for file_name in sorted(files):
+            if file_name.endswith('.dcm'):
+                yield root, relative_dir, file_name
+
+
+def _data_signature(data_dir: str) -> str:
+    """Hash of every indexed file's path, mtime and size (stat only, no DICOM parsing)"""
+    digest = hashlib.sha1()
+    for root, relative_dir, file_name in _walk_case_files(data_dir):
+        stat = os.stat(os.path.join(root, file_name))
+        digest.update(f"{os.path.join(relative_dir, file_name)}\0"
+                      f"{stat.st_mtime_ns}\0{stat.st_size}\n".encode())
+    return digest.hexdigest()
+
+
+def _read_header(path: str) -> Optional[dict]:
+    """Read the indexed header fields only, without touching the pixel data"""
+    try:
+        ds = pydicom.dcmread(path, stop_before_pixels=True, specific_tags=_HEADER_TAGS)
+    except Exception as e:
+        print(f"Skipping unreadable DICOM {path}: {str(e)}")
+        return None
+
+    position = ds.get("ImagePositionPatient")
+    slice_position = float(position[2]) if position else ds.get("SliceLocation")
+    instance_uid = ds.get("SOPInstanceUID") or \
+        getattr(ds, "file_meta", {}).get("MediaStorageSOPInstanceUID")
+    sign = "int" if ds.get("PixelRepresentation", 0) else "uint"
+
+    return {
+        "series_uid": str(ds.SeriesInstanceUID) if "SeriesInstanceUID" in ds else None,
+        "instance_uid": str(instance_uid) if instance_uid else None,
+        "instance_number": int(ds.InstanceNumber) if ds.get("InstanceNumber") is not None else None,
+        "slice_position": float(slice_position) if slice_position is not None else None,
+        "rows": ds.get("Rows"),
+        "columns": ds.get("Columns"),
+        "dtype": f"{sign}{ds.get('BitsAllocated', 16)}",
+    }
+
+
+def _slice_order(entry: dict) -> tuple:
+    """Order slices by position, then instance number, then file name"""
+    return (entry["slice_position"] is None, entry["slice_position"] or 0.0,
+            entry["instance_number"] is None, entry["instance_number"] or 0,
+            entry["path"])
+
+
+def _ordered_series(case_series: dict) -> List[List[dict]]:
+    """Series of a case numbered from 0, largest first (the main acquisition), then by UID"""
+    return [case_series[uid] for uid in
+            sorted(case_series, key=lambda uid: (-len(case_series[uid]), uid))]
+
+
+def build_manifest(data_dir: str) -> int:
+    """
+    Scan the case directories of data_dir once and (re)write its SQLite manifest,
+    returns the number of indexed slices
+    """
+    signature = _data_signature(data_dir)  # Taken first, changes during the scan trigger a rebuild
+    series_by_case = {}
+    for root, relative_dir, file_name in _walk_case_files(data_dir):
+        header = _read_header(os.path.join(root, file_name))
+        if header is None:
+            continue
+        header["path"] = os.path.normpath(os.path.join(relative_dir, file_name))
+        series_by_case.setdefault(_case_id(relative_dir), {}) \
+            .setdefault(header["series_uid"] or "", []).append(header)
+
+    rows = [
+        (case_id, series, index, entry["path"], entry["series_uid"], entry["instance_uid"],
+         entry["instance_number"], entry["slice_position"],
+         entry["rows"], entry["columns"], entry["dtype"])
+        for case_id, case_series in series_by_case.items()
+        for series, entries in enumerate(_ordered_series(case_series))
+        for index, entry in enumerate(sorted(entries, key=_slice_order))
+    ]
+
+    # Written aside then swapped in, so a corrupt manifest is replaced and readers never see a partial one
+    path = manifest_path(data_dir)
+    temp_path = f"{path}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    with sqlite3.connect(temp_path) as connection:
+        connection.execute(_SCHEMA)
+        connection.execute(_META_SCHEMA)
+        connection.execute("CREATE INDEX slices_instance ON slices (instance_uid)")
+        connection.executemany(
+            "INSERT INTO slices VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        connection.execute(
+            "INSERT INTO manifest_meta VALUES ('signature', ?)", (signature,))
+    connection.close()
+    os.replace(temp_path, path)
+
+    return len(rows)
+
+
+def _manifest_is_current(data_dir: str) -> bool:
+    """The manifest exists, has its tables and matches the current case files"""
+    path = manifest_path(data_dir)
+    if not os.path.exists(path):
+        return False
+
+    connection = sqlite3.connect(path)
+    try:
+        row = connection.execute(
+            "SELECT value FROM manifest_meta WHERE key = 'signature' "
+            "AND EXISTS (SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'slices')"
+        ).fetchone()
+    except sqlite3.DatabaseError:
+        return False  # Empty, truncated or foreign file
+    finally:
+        connection.close()
+
+    return row is not None and row[0] == _data_signature(data_dir)
+
+
+def _connect(data_dir: str) -> sqlite3.Connection:
+    if not _manifest_is_current(data_dir):
+        print(f"Manifest of {data_dir} missing or stale, indexing...")
+        build_manifest(data_dir)
+    return sqlite3.connect(manifest_path(data_dir))
+
+###################################################################################
+
+
+def get_sample_path(data_dir: str, sample_id: str) -> str:
+    """Path of a single slice, e.g. '1_008' -> slice 8 of case 1's main series"""
+    case_id, series, slice_index = parse_sample_id(sample_id)
+    connection = _connect(data_dir)
+    try:
+        row = connection.execute(
+            "SELECT path FROM slices WHERE case_id = ? AND series = ? AND slice = ?",
+            (case_id, series, slice_index)).fetchone()
+    finally:
+        connection.close()
+
+    if row is None:
+        raise FileNotFoundError(f"No DICOM file indexed for {sample_id}")
+    return os.path.join(data_dir, row[0])
+
+
+def query_slices(data_dir: str, case_id: str, start: Optional[int] = None,
+                 stop: Optional[int] = None, series: int = 0
+                 ) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    (sample_id, path, instance_uid) of one series of a case (0 = main series) in slice
+    order, optionally restricted to slices start..stop (inclusive)
+    """
+    connection = _connect(data_dir)
+    try:
+        rows = connection.execute(
+            "SELECT slice, path, instance_uid FROM slices "
+            "WHERE case_id = ? AND series = ? AND slice BETWEEN ? AND ? ORDER BY slice",
+            (case_id, series, 0 if start is None else start,
+             2**31 - 1 if stop is None else stop)).fetchall()
+    finally:
+        connection.close()
+
+    return [(format_sample_id(case_id, series, index), os.path.join(data_dir, path), uid)
+            for index, path, uid in rows]
@@ -1,13 +1,18 @@
 import pydicom
 from pydicom.dataset import Dataset, FileDataset
-from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+from pydicom.uid import (
+    ExplicitVRLittleEndian, DeflatedExplicitVRLittleEndian, RLELossless, CTImageStorage,
+    generate_uid
+)
 from pydicom.filebase import DicomBytesIO
+from pydicom.valuerep import DSfloat
 import numpy as np
 from datetime import datetime
-from constants import DICOM_METADATA
+from typing import List, Optional, Sequence, Tuple, Union
+from constants import DICOM_METADATA, SINOGRAM_COMPRESSION, SINOGRAM_STORED_MAX
 
-def _create_dicom_base(image: np.ndarray, is_sinogram: bool = False) -> FileDataset:
-    """Create DICOM dataset compliant with CT Image Storage SOP Class"""
+def _create_dicom_header(rows: int, columns: int, is_sinogram: bool = False) -> FileDataset:
+    """Create DICOM dataset (without pixel data) compliant with CT Image Storage SOP Class"""
     # File Meta Information
     file_meta = pydicom.FileMetaDataset()
     file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
@@ -38,7 +43,7 @@ def _create_dicom_base(image: np.ndarray, is_sinogram: bool = False) -> FileData
     ds.FrameOfReferenceUID = generate_uid()
     
     # Image Pixel Module
-    ds.Rows, ds.Columns = image.shape
+    ds.Rows, ds.Columns = rows, columns
     ds.BitsAllocated = 16
     ds.BitsStored = 16
     ds.HighBit = 15
@@ -56,10 +61,6 @@ def _create_dicom_base(image: np.ndarray, is_sinogram: bool = False) -> FileData
     ds.WindowWidth = 400
     ds.SliceThickness = 1.0
     
-    # Convert to Hounsfield Units
-    hu_image = _to_hounsfield(image)  
-    ds.PixelData = hu_image.astype(np.int16).tobytes()
-    
     # Type-specific metadata
     if is_sinogram:
         ds.SeriesDescription = "Radon Transform Sinogram"
@@ -73,6 +74,61 @@ def _create_dicom_base(image: np.ndarray, is_sinogram: bool = False) -> FileData
     return ds
 
 
+def _create_dicom_base(image: np.ndarray, is_sinogram: bool = False) -> FileDataset:
+    """Create DICOM dataset compliant with CT Image Storage SOP Class"""
+    ds = _create_dicom_header(*image.shape, is_sinogram=is_sinogram)
+
+    # Convert to Hounsfield Units
+    hu_image = _to_hounsfield(image)
+    ds.PixelData = hu_image.astype(np.int16).tobytes()
+
+    return ds
+
+
+def _to_ds(value: float) -> float:
+    # Round to what a DS (16 characters) element can actually hold
+    return float(DSfloat(value, auto_format=True))
+
+def _rescale_params(data: np.ndarray) -> Tuple[float, float]:
+    """Choose RescaleSlope/Intercept mapping the data range onto the full uint16 range"""
+    low, high = float(data.min()), float(data.max())
+    intercept = _to_ds(low)
+    slope = _to_ds((high - intercept) / SINOGRAM_STORED_MAX) if high > intercept else 1.0
+    return slope, intercept
+
+
+def _create_sinogram_dataset(frames: np.ndarray, compression: str) -> FileDataset:
+    """Create a (multi-frame) sinogram dataset with data-driven rescale and optional compression"""
+    if frames.ndim != 3:
+        raise ValueError("Sinogram frames must be a (frames, rows, columns) array")
+
+    ds = _create_dicom_header(*frames.shape[1:], is_sinogram=True)
+    ds.NumberOfFrames = frames.shape[0]
+
+    # Quantize onto uint16 with a data-driven rescale instead of the fixed HU mapping
+    slope, intercept = _rescale_params(frames)
+    stored = np.rint((frames - intercept) / slope)
+    stored = np.clip(stored, 0, SINOGRAM_STORED_MAX).astype(np.uint16)
+
+    ds.RescaleSlope = slope
+    ds.RescaleIntercept = intercept
+    ds.RescaleType = "US"  # Unspecified, values are line integrals and not HU
+    ds.WindowCenter = _to_ds(intercept + slope * SINOGRAM_STORED_MAX / 2)
+    ds.WindowWidth = _to_ds(max(slope * SINOGRAM_STORED_MAX, 1.0))
+
+    if compression == "rle":
+        ds.compress(RLELossless, stored if len(stored) > 1 else stored[0])
+    elif compression == "deflate":
+        ds.PixelData = stored.tobytes()
+        ds.file_meta.TransferSyntaxUID = DeflatedExplicitVRLittleEndian
+    elif compression == "none":
+        ds.PixelData = stored.tobytes()
+    else:
+        raise ValueError(f"Unknown sinogram compression: {compression}")
+
+    return ds
+
+
 def _to_hounsfield(tensor: np.ndarray) -> np.ndarray:
     # Scale [0,1] -> [-1000, +1000] HU
     return (tensor * 2000) - 1000
@@ -90,11 +146,47 @@ def save_phantom_dicom(phantom: np.ndarray, filename: str) -> None:
     ds = _create_dicom_base(phantom)
     ds.save_as(filename)
 
-def save_sinogram_dicom(sinogram: np.ndarray, filename: str) -> None:
-    """Save sinogram as valid DICOM file"""
-    ds = _create_dicom_base(sinogram, is_sinogram=True)
+def save_sinogram_dicom(sinogram: np.ndarray, filename: str,
+                        compression: str = SINOGRAM_COMPRESSION) -> None:
+    """Save sinogram as valid DICOM file without clipping its value range"""
+    ds = _create_sinogram_dataset(sinogram[np.newaxis], compression)
+    ds.save_as(filename)
+
+def save_sinogram_series_dicom(sinograms: Union[np.ndarray, Sequence[np.ndarray]], filename: str,
+                               compression: str = SINOGRAM_COMPRESSION,
+                               source_uids: Optional[Sequence[Optional[str]]] = None) -> None:
+    """
+    Save a whole series of sinograms as a single multi-frame DICOM file.
+    source_uids (SOP Instance UID of each frame's source slice) are recorded in
+    ReferencedImageSequence, one item per frame, so frames map back to slices.
+    """
+    ds = _create_sinogram_dataset(np.stack(sinograms), compression)
+    if source_uids is not None:
+        ds.ReferencedImageSequence = [
+            _referenced_frame(frame, uid) for frame, uid in enumerate(source_uids, start=1)
+        ]
     ds.save_as(filename)
 
+def _referenced_frame(frame: int, source_uid: Optional[str]) -> Dataset:
+    item = Dataset()
+    item.ReferencedSOPClassUID = CTImageStorage
+    item.ReferencedSOPInstanceUID = source_uid or ""
+    item.ReferencedFrameNumber = frame
+    return item
+
+def load_sinogram_sources(filename: str) -> List[str]:
+    """Source slice SOP Instance UIDs of each frame of a sinogram series, in frame order"""
+    ds = pydicom.dcmread(filename, stop_before_pixels=True)
+    return [str(item.ReferencedSOPInstanceUID) for item in ds.get("ReferencedImageSequence", [])]
+
+def load_sinogram_dicom(filename: str) -> np.ndarray:
+    """Load sinogram(s) written by save_sinogram_dicom / save_sinogram_series_dicom"""
+    ds = pydicom.dcmread(filename)
+    sinogram = ds.pixel_array.astype(np.float32)
+    sinogram *= float(ds.RescaleSlope)
+    sinogram += float(ds.RescaleIntercept)
+    return sinogram
+
 def load_dicom(filename: str) -> np.ndarray:
     """Load DICOM file with proper transfer syntax handling"""
     ds = pydicom.dcmread(filename)
@@ -1,16 +1,19 @@
 import os
 import argparse
 import numpy as np
-from typing import Final, List, Optional
+from typing import Final, List, Optional, Tuple
 from constants import (
     SYNTHETIC_DIR, REAL_DATA_DIR, NUM_SAMPLES,
-    IMAGE_SIZE, NOISE_LEVEL, THETA
+    IMAGE_SIZE, NOISE_LEVEL,
+    PIPELINE_READ_DEPTH, PIPELINE_WRITE_DEPTH, PIPELINE_COMPUTE_WORKERS, PIPELINE_SERIES_CHUNK
 )
-from synthetic_data import generate_dataset
+from synthetic_data import generate_dataset, generate_phantom
+from acquisition_sweep import run_acquisition_sweep, print_sweep_table
 from data_downloader import download_real_ct_data
 from dicom_io import save_sinogram_dicom, load_dicom
-from radon_transform import compute_sinogram, filtered_back_projection, simple_back_projection
-from metrics import calculate_metrics
+from dataset_index import build_manifest, get_sample_path, query_slices
+from pipeline import reconstruct_and_evaluate, sinogram_filename, run_pipeline
+from radon_transform import DEFAULT_PREPROCESS, PREPROCESS_PRESETS
 from visualization import plot_results
 
 ###################################################################################
@@ -29,7 +32,7 @@ def validate_sample_id(sample_id: str, data_type: str) -> bool:
     """Validate sample ID based on data type"""
     if data_type == "real":
         if "_" not in sample_id:
-            print(f"Invalid real data format. Use 'X_XXX' format (e.g., 1_008)")
+            print(f"Invalid real data format. Use 'CASE_SLICE' or 'CASE_SERIES_SLICE' format (e.g., 1_008)")
             return False
         return True
     else:
@@ -46,28 +49,21 @@ def validate_sample_id(sample_id: str, data_type: str) -> bool:
 
 
 def process_phantom(phantom: np.ndarray, data_path: str,
-                    sample_id: str, process_mode: str) -> None:
+                    sample_id: str, process_mode: str,
+                    preprocess: str = DEFAULT_PREPROCESS) -> None:
     """Core processing pipeline for a single phantom"""
     try:
         print(f"\nProcessing sample {sample_id} ({process_mode})")
 
-        # Compute Radon transform
-        sinogram = compute_sinogram(phantom, THETA)
+        # Compute Radon transform, reconstructions and metrics
+        sinogram, fbp_recon, bp_recon, metrics_fbp, metrics_bp = \
+            reconstruct_and_evaluate(phantom, preprocess)
 
         # Save sinogram with mode differentiation
         sinogram_dir = os.path.join(data_path, "sinograms")
         os.makedirs(sinogram_dir, exist_ok=True)
-        sinogram_file = f"sinogram_{sample_id.replace('_', '-')}_{process_mode}.dcm"
         save_sinogram_dicom(sinogram, os.path.join(
-            sinogram_dir, sinogram_file))
-
-        # Reconstructions
-        fbp_recon = filtered_back_projection(sinogram, THETA, IMAGE_SIZE)
-        bp_recon = simple_back_projection(sinogram, THETA, IMAGE_SIZE)
-
-        # Calculate metrics
-        metrics_fbp = calculate_metrics(phantom, fbp_recon)
-        metrics_bp = calculate_metrics(phantom, bp_recon)
+            sinogram_dir, sinogram_filename(sample_id, process_mode)))
 
         # Visualize results
         plot_results(
@@ -81,34 +77,58 @@ def process_phantom(phantom: np.ndarray, data_path: str,
         raise
 
 
-def process_real_data_sample(data_path: str, sample_id: str) -> None:
+def process_real_data_sample(data_path: str, sample_id: str,
+                             preprocess: str = DEFAULT_PREPROCESS) -> None:
     """Handle processing of real CT cases"""
     try:
-        case_num, file_num = sample_id[0:1], sample_id[1:1]
-        case_dir = f"case{case_num}"
-        file_prefix = f"case{case_num}{file_num}"
-
-        case_path = os.path.join(data_path, case_dir)
-        if not os.path.isdir(case_path):
-            raise FileNotFoundError(f"Case directory not found: {case_path}")
-
-        # Find matching DICOM file
-        matches = [f for f in os.listdir(case_path)
-                   if f.startswith(file_prefix) and f.endswith('.dcm')]
-
-        if not matches:
-            raise FileNotFoundError(f"No DICOM files found for {sample_id}")
-
-        file_path = os.path.join(case_path, matches[0])
+        file_path = get_sample_path(data_path, sample_id)
         phantom = load_dicom(file_path)
-        process_phantom(phantom, data_path, sample_id, "original")
+        process_phantom(phantom, data_path, sample_id, "original", preprocess)
 
     except Exception as e:
         print(f"Error processing real data sample: {str(e)}")
         raise
 
 
-def process_synthetic_data_sample(data_path: str, sample_id: int) -> None:
+def process_real_data_case(data_path: str, case_num: str,
+                           read_depth: int = PIPELINE_READ_DEPTH,
+                           write_depth: int = PIPELINE_WRITE_DEPTH,
+                           compute_workers: int = PIPELINE_COMPUTE_WORKERS,
+                           preprocess: str = DEFAULT_PREPROCESS,
+                           slice_range: Optional[Tuple[int, int]] = None,
+                           series: int = 0,
+                           series_chunk: int = PIPELINE_SERIES_CHUNK) -> None:
+    """
+    Process the slices of a real CT case (optionally a start..stop range) with the overlapped
+    I/O pipeline, sinograms are streamed into multi-frame files of series_chunk slices
+    """
+    samples = query_slices(data_path, case_num, *(slice_range or (None, None)), series=series)
+    if not samples:
+        raise FileNotFoundError(f"No DICOM files indexed for case {case_num} series {series}")
+
+    print(f"\nProcessing case {case_num} ({len(samples)} slices)")
+    results, _ = run_pipeline(samples, data_path, "original",
+                              read_depth, write_depth, compute_workers, preprocess,
+                              series_chunk)
+
+    for sample_id, *_ in samples:
+        if sample_id not in results:
+            continue
+        _, psnr_fbp, ssim_fbp = results[sample_id]["metrics_fbp"]
+        print(f"{sample_id}: FBP PSNR {psnr_fbp:.2f} SSIM {ssim_fbp:.3f}")
+
+
+def parse_slice_range(value: str) -> Tuple[int, int]:
+    """Parse an inclusive 'START-STOP' slice range (e.g. 100-200)"""
+    try:
+        start, stop = (int(v) for v in value.split("-"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid slice range: {value}")
+    return start, stop
+
+
+def process_synthetic_data_sample(data_path: str, sample_id: int,
+                                  preprocess: str = DEFAULT_PREPROCESS) -> None:
     """Handle all processing modes for synthetic data"""
     for mode in SYNTHETIC_PROCESS_MODES:
         try:
@@ -119,7 +139,7 @@ def process_synthetic_data_sample(data_path: str, sample_id: int) -> None:
                 raise FileNotFoundError(f"DICOM file not found: {file_path}")
 
             phantom = load_dicom(file_path)
-            process_phantom(phantom, data_path, str(sample_id), mode)
+            process_phantom(phantom, data_path, str(sample_id), mode, preprocess)
 
         except Exception as e:
             print(f"Error processing {mode} mode: {str(e)}")
@@ -138,10 +158,30 @@ def main() -> None:
                         help="Generate synthetic dataset")
     parser.add_argument("--download", action="store_true",
                         help="Download real CT dataset")
+    parser.add_argument("--sweep", action="store_true",
+                        help="Benchmark reconstruction engines over angle count, angular range and dose")
+    parser.add_argument("--index", action="store_true",
+                        help="(Re)build the slice manifest of the real data directory")
     parser.add_argument("--process", type=str,
-                        help="Process sample by ID (format: N for synthetic, X_XXX for real)")
+                        help="Process sample by ID (format: N for synthetic, CASE_SLICE or CASE_SERIES_SLICE for real)")
     parser.add_argument("--data-type", choices=["synthetic", "real"], default="synthetic",
                         help="Type of data to process")
+    parser.add_argument("--preprocess", choices=list(PREPROCESS_PRESETS), default=DEFAULT_PREPROCESS,
+                        help="Sinogram preprocessing preset applied before reconstruction")
+    parser.add_argument("--process-case", type=str,
+                        help="Process every slice of a real case (e.g. 3) with the batch pipeline")
+    parser.add_argument("--slices", type=parse_slice_range,
+                        help="Batch pipeline: inclusive slice range of the case (e.g. 100-200)")
+    parser.add_argument("--series", type=int, default=0,
+                        help="Batch pipeline: series of the case (0 = main series, the one with most slices)")
+    parser.add_argument("--read-depth", type=int, default=PIPELINE_READ_DEPTH,
+                        help="Batch pipeline: slices prefetched ahead of compute")
+    parser.add_argument("--write-depth", type=int, default=PIPELINE_WRITE_DEPTH,
+                        help="Batch pipeline: sinograms queued for background writing")
+    parser.add_argument("--workers", type=int, default=PIPELINE_COMPUTE_WORKERS,
+                        help="Batch pipeline: compute threads")
+    parser.add_argument("--series-chunk", type=int, default=PIPELINE_SERIES_CHUNK,
+                        help="Batch pipeline: slices per multi-frame sinogram file (0: one file per slice)")
 
     try:
         args = parser.parse_args()
@@ -158,6 +198,32 @@ def main() -> None:
         if args.download:
             print("Downloading real CT data...")
             download_real_ct_data()
+            print(f"Indexed {build_manifest(REAL_DATA_DIR)} slices")
+            return
+
+        if args.index:
+            if not os.path.isdir(REAL_DATA_DIR):
+                raise NotADirectoryError(
+                    f"Data directory not found: {REAL_DATA_DIR}")
+
+            print(f"Indexed {build_manifest(REAL_DATA_DIR)} slices in {REAL_DATA_DIR}")
+            return
+
+        if args.sweep:
+            print("Running sparse/limited-angle dose sweep...")
+            print_sweep_table(run_acquisition_sweep(
+                generate_phantom(IMAGE_SIZE, seed=0)))
+            return
+
+        if args.process_case is not None:
+            if not os.path.isdir(REAL_DATA_DIR):
+                raise NotADirectoryError(
+                    f"Data directory not found: {REAL_DATA_DIR}")
+
+            process_real_data_case(REAL_DATA_DIR, args.process_case,
+                                   args.read_depth, args.write_depth, args.workers,
+                                   args.preprocess, args.slices, args.series,
+                                   args.series_chunk)
             return
 
         if args.process is not None:
@@ -169,9 +235,9 @@ def main() -> None:
                 return
 
             if args.data_type == "real":
-                process_real_data_sample(data_path, args.process)
+                process_real_data_sample(data_path, args.process, args.preprocess)
             else:
-                process_synthetic_data_sample(data_path, int(args.process))
+                process_synthetic_data_sample(data_path, int(args.process), args.preprocess)
             return
 
         parser.print_help()
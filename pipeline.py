@@ -0,0 +1,242 @@
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Final, List, Optional, Tuple
+import numpy as np
+from constants import (
+    IMAGE_SIZE, THETA, PIPELINE_READ_DEPTH, PIPELINE_WRITE_DEPTH, PIPELINE_COMPUTE_WORKERS,
+    PIPELINE_SERIES_CHUNK
+)
+from dicom_io import load_dicom, save_sinogram_dicom, save_sinogram_series_dicom
+from radon_transform import (
+    compute_sinogram, filtered_back_projection, simple_back_projection,
+    preprocess_sinogram, DEFAULT_PREPROCESS
+)
+from metrics import calculate_metrics
+
+###################################################################################
+
+_END: Final[object] = object()  # Queue sentinel marking the end of a stage's input
+
+###################################################################################
+
+
+@dataclass
+class StageStats:
+    """Throughput counters of a single pipeline stage"""
+    name: str
+    items: int = 0
+    failures: int = 0
+    busy_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, seconds: float, failed: bool = False, count: int = 1) -> None:
+        with self._lock:
+            self.busy_seconds += seconds
+            if failed:
+                self.failures += count
+            else:
+                self.items += count
+
+    @property
+    def throughput(self) -> float:
+        """Processed items per busy second"""
+        return self.items / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+
+def sinogram_filename(sample_id: str, process_mode: str) -> str:
+    """Naming convention of saved sinograms"""
+    return f"sinogram_{sample_id.replace('_', '-')}_{process_mode}.dcm"
+
+
+def reconstruct_and_evaluate(phantom: np.ndarray, preprocess: str = DEFAULT_PREPROCESS
+                             ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, tuple, tuple]:
+    """(Preprocessed) sinogram, FBP/BP reconstructions and their metrics for a single phantom"""
+    sinogram = preprocess_sinogram(compute_sinogram(phantom, THETA), preprocess)
+
+    fbp_recon = filtered_back_projection(sinogram, THETA, IMAGE_SIZE)
+    bp_recon = simple_back_projection(sinogram, THETA, IMAGE_SIZE)
+
+    metrics_fbp = calculate_metrics(phantom, fbp_recon)
+    metrics_bp = calculate_metrics(phantom, bp_recon)
+
+    return sinogram, fbp_recon, bp_recon, metrics_fbp, metrics_bp
+
+###################################################################################
+
+
+def _read_stage(samples: List[tuple], out_queue: queue.Queue,
+                stats: StageStats, consumers: int) -> None:
+    """
+    Prefetch slices from disk, blocking when the compute stage lags behind.
+    Items carry the sample's position in `samples`; failed reads are forwarded
+    without data so the writer can keep frames in order.
+    """
+    for index, (sample_id, path, *source) in enumerate(samples):
+        source_uid = source[0] if source else None
+        start = time.perf_counter()
+        try:
+            phantom = load_dicom(path)
+        except Exception as e:
+            stats.record(time.perf_counter() - start, failed=True)
+            print(f"Read failed for {sample_id}: {str(e)}")
+            phantom = None
+        else:
+            stats.record(time.perf_counter() - start)
+        out_queue.put((index, sample_id, source_uid, phantom))
+
+    for _ in range(consumers):
+        out_queue.put(_END)
+
+
+def _compute_stage(in_queue: queue.Queue, out_queue: queue.Queue,
+                   stats: StageStats, results: Dict[str, dict], preprocess: str) -> None:
+    """Reconstruct slices while neighbouring stages do I/O"""
+    while (item := in_queue.get()) is not _END:
+        index, sample_id, source_uid, phantom = item
+        sinogram = None
+        if phantom is not None:
+            start = time.perf_counter()
+            try:
+                sinogram, _, _, metrics_fbp, metrics_bp = reconstruct_and_evaluate(phantom, preprocess)
+            except Exception as e:
+                stats.record(time.perf_counter() - start, failed=True)
+                print(f"Compute failed for {sample_id}: {str(e)}")
+            else:
+                stats.record(time.perf_counter() - start)
+                results[sample_id] = {"metrics_fbp": metrics_fbp, "metrics_bp": metrics_bp}
+
+        out_queue.put((index, sample_id, source_uid, sinogram))
+
+    out_queue.put(_END)
+
+
+def _write_series(chunk: List[tuple], sinogram_dir: str, process_mode: str,
+                  stats: StageStats) -> None:
+    """Write consecutive (sample_id, source_uid, sinogram) frames as one multi-frame file"""
+    name = f"{chunk[0][0]}_{chunk[-1][0]}"
+    start = time.perf_counter()
+    try:
+        save_sinogram_series_dicom(
+            [sinogram for _, _, sinogram in chunk],
+            os.path.join(sinogram_dir, sinogram_filename(name, process_mode)),
+            source_uids=[source_uid for _, source_uid, _ in chunk])
+    except Exception as e:
+        stats.record(time.perf_counter() - start, failed=True, count=len(chunk))
+        print(f"Write failed for series {name}: {str(e)}")
+        return
+    stats.record(time.perf_counter() - start, count=len(chunk))
+
+
+def _write_stage(in_queue: queue.Queue, sinogram_dir: str, process_mode: str,
+                 stats: StageStats, producers: int, series_chunk: int) -> None:
+    """
+    Write finished sinograms in the background: one file per slice, or with series_chunk
+    multi-frame files of that many consecutive slices, flushed as soon as they are complete
+    """
+    pending: Dict[int, tuple] = {}  # Reorders out-of-order compute results
+    next_index = 0
+    chunk: List[tuple] = []
+
+    remaining = producers
+    while remaining:
+        item = in_queue.get()
+        if item is _END:
+            remaining -= 1
+            continue
+
+        index, sample_id, source_uid, sinogram = item
+        if not series_chunk:
+            if sinogram is not None:
+                start = time.perf_counter()
+                try:
+                    save_sinogram_dicom(sinogram, os.path.join(
+                        sinogram_dir, sinogram_filename(sample_id, process_mode)))
+                except Exception as e:
+                    stats.record(time.perf_counter() - start, failed=True)
+                    print(f"Write failed for {sample_id}: {str(e)}")
+                else:
+                    stats.record(time.perf_counter() - start)
+            continue
+
+        pending[index] = (sample_id, source_uid, sinogram)
+        while next_index in pending:
+            frame = pending.pop(next_index)
+            next_index += 1
+            if frame[2] is None:
+                continue  # Failed upstream, already counted there
+            if chunk and chunk[-1][2].shape != frame[2].shape:
+                _write_series(chunk, sinogram_dir, process_mode, stats)
+                chunk = []
+            chunk.append(frame)
+            if len(chunk) >= series_chunk:
+                _write_series(chunk, sinogram_dir, process_mode, stats)
+                chunk = []
+
+    if chunk:
+        _write_series(chunk, sinogram_dir, process_mode, stats)
+
+
+def run_pipeline(samples: List[tuple], data_path: str, process_mode: str,
+                 read_depth: int = PIPELINE_READ_DEPTH,
+                 write_depth: int = PIPELINE_WRITE_DEPTH,
+                 compute_workers: int = PIPELINE_COMPUTE_WORKERS,
+                 preprocess: str = DEFAULT_PREPROCESS,
+                 series_chunk: int = 0
+                 ) -> Tuple[Dict[str, dict], Dict[str, StageStats]]:
+    """
+    Process (sample_id, dicom_path[, source_uid]) samples with overlapped read / compute /
+    write stages. Bounded queues (read_depth, write_depth) provide backpressure between stages.
+    With series_chunk > 0, sinograms are written in the background as multi-frame files of
+    series_chunk consecutive samples (in `samples` order, each frame referencing its source_uid)
+    instead of one file per slice.
+    Returns the metrics per sample and the throughput counters per stage.
+    """
+    if compute_workers < 1:
+        raise ValueError(f"At least one compute worker is required, got {compute_workers}")
+    if read_depth < 1 or write_depth < 1:
+        raise ValueError(f"Queue depths must be positive, got {read_depth} and {write_depth}")
+    if series_chunk < 0:
+        raise ValueError(f"Series chunk must be positive or 0, got {series_chunk}")
+
+    sinogram_dir = os.path.join(data_path, "sinograms")
+    os.makedirs(sinogram_dir, exist_ok=True)
+
+    read_queue: queue.Queue = queue.Queue(maxsize=read_depth)
+    write_queue: queue.Queue = queue.Queue(maxsize=write_depth)
+    stats = {name: StageStats(name) for name in ("read", "compute", "write")}
+    results: Dict[str, dict] = {}
+
+    threads = [
+        threading.Thread(target=_read_stage, name="read",
+                         args=(samples, read_queue, stats["read"], compute_workers)),
+        threading.Thread(target=_write_stage, name="write",
+                         args=(write_queue, sinogram_dir, process_mode,
+                               stats["write"], compute_workers, series_chunk)),
+    ] + [
+        threading.Thread(target=_compute_stage, name=f"compute-{i}",
+                         args=(read_queue, write_queue, stats["compute"], results, preprocess))
+        for i in range(compute_workers)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print_pipeline_stats(stats, elapsed)
+    return results, stats
+
+
+def print_pipeline_stats(stats: Dict[str, StageStats], elapsed: Optional[float] = None) -> None:
+    """Summarize per-stage throughput"""
+    for stage in stats.values():
+        print(f"[{stage.name:>7}] {stage.items} items, {stage.failures} failed, "
+              f"{stage.busy_seconds:.2f}s busy, {stage.throughput:.2f} items/s")
+    if elapsed is not None:
+        busy = sum(stage.busy_seconds for stage in stats.values())
+        print(f"Wall time {elapsed:.2f}s for {busy:.2f}s of stage work")
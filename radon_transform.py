@@ -1,7 +1,11 @@
+import time
 import numpy as np
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+from scipy.sparse import csr_matrix
 from skimage.transform import radon as sk_radon, iradon as sk_iradon
 from scipy.fft import fft, fftfreq, ifft
-from scipy.ndimage import rotate
+from scipy.ndimage import rotate, gaussian_filter1d, median_filter
 
 ###################################################################################
 
@@ -9,6 +13,22 @@ DEFAULT_USE_LIBRARY_RADON: bool = True # Works
 DEFAULT_USE_LIBRARY_FBP: bool = True # Works
 DEFAULT_USE_LIBRARY_BP: bool = True # ??? (both don't work great)
 
+# Sinogram preprocessing, sinograms are (..., detector, angle) arrays
+DEFAULT_PREPROCESS: str = "none"
+DETECTOR_SIGMA: float = 1.5  # Smoothing width along the detector axis (bins)
+BILATERAL_RANGE_FACTOR: float = 3.0  # Range sigma, in measured noise standard deviations
+RING_FILTER_SIZE: int = 9  # Detector bins used to estimate the ring-free profile
+OUTLIER_FILTER_SIZE: int = 3
+OUTLIER_THRESHOLD: float = 5.0  # In robust standard deviations (MAD over the object support)
+OUTLIER_RELATIVE_FLOOR: float = 0.1  # Minimum spike height, relative to the sinogram peak
+
+# TV-regularized reconstruction (preconditioned Chambolle-Pock)
+TV_WEIGHT: float = 1.0  # Regularization strength, relative to sinogram units
+TV_MAX_ITERATIONS: int = 150
+TV_TOLERANCE: float = 3e-3  # Stop once the mean relative update norm falls below
+TV_CONVERGENCE_WINDOW: int = 10  # Iterations averaged by the stopping rule (updates oscillate)
+TV_OPERATOR_CACHE_SIZE: int = 4  # Distinct (size, detectors, theta) operators kept
+
 ###################################################################################
 
 
@@ -50,9 +70,277 @@ def simple_back_projection(
     return _back_project(sinogram, theta, size)
 
 
+def tv_reconstruction(
+    sinogram: np.ndarray,
+    theta: np.ndarray,
+    size: int,
+    weight: float = TV_WEIGHT,
+    max_iterations: int = TV_MAX_ITERATIONS,
+    time_limit: Optional[float] = None,
+    tolerance: float = TV_TOLERANCE,
+    nonnegative: bool = True
+) -> Tuple[np.ndarray, dict]:
+    """
+    Total-variation regularized reconstruction, min 1/2 |Ax - b|^2 + weight * TV(x),
+    solved with diagonally preconditioned Chambolle-Pock on a cached sparse projector.
+    Accepts a sinogram or a (batch, detector, angle) stack sharing the same operator.
+    Stops after max_iterations, time_limit seconds or once the relative update, averaged
+    over the last TV_CONVERGENCE_WINDOW iterations, is below tolerance. With the defaults a
+    256x256 slice typically stops after 20-130 iterations (~60 ms each at 180 angles,
+    ~20 ms at 60 angles), plus a one-off operator build per (size, detectors, theta).
+    Returns the reconstruction(s) and convergence statistics.
+    """
+    start = time.perf_counter()
+    batched = sinogram.ndim == 3
+    sinograms = sinogram if batched else sinogram[np.newaxis]
+    batch, n_detectors, n_angles = sinograms.shape
+    if n_angles != len(theta):
+        raise ValueError("Sinogram angle axis does not match theta")
+
+    forward, backward, sigma, tau = _projection_operator(
+        size, n_detectors, tuple(np.asarray(theta, dtype=float)))
+
+    # Unknowns are stored as (pixels, batch) / (measurements, batch) columns
+    b = sinograms.reshape(batch, -1).T.astype(np.float32)
+    x = np.stack([
+        sk_iradon(s, theta=theta, filter_name='ramp', output_size=size, circle=False)
+        for s in sinograms
+    ]).reshape(batch, -1).T.astype(np.float32)  # FBP warm start
+    if nonnegative:
+        np.maximum(x, 0, out=x)
+    x_bar = x.copy()
+    p = np.zeros_like(b)
+    q = np.zeros((2, size * size, batch), dtype=np.float32)
+
+    history = []
+    converged = False
+    iteration = 0
+    for iteration in range(1, max_iterations + 1):
+        # Dual ascent: data term (prox of the quadratic conjugate) and TV term (projection)
+        p += sigma * (forward @ x_bar - b)
+        p /= 1 + sigma
+        q += 0.5 * _gradient(x_bar, size)
+        q /= np.maximum(1, np.sqrt((q**2).sum(axis=0)) / weight)
+
+        # Primal descent with over-relaxation
+        x_new = x - tau * (backward @ p + _divergence_adjoint(q, size))
+        if nonnegative:
+            np.maximum(x_new, 0, out=x_new)
+        change = np.linalg.norm(x_new - x) / max(np.linalg.norm(x_new), 1e-12)
+        x_bar = 2 * x_new - x
+        x = x_new
+
+        history.append(float(change))
+        if len(history) >= TV_CONVERGENCE_WINDOW and \
+                np.mean(history[-TV_CONVERGENCE_WINDOW:]) < tolerance:
+            converged = True
+            break
+        if time_limit is not None and time.perf_counter() - start > time_limit:
+            break
+
+    residual = np.linalg.norm(forward @ x - b) / max(np.linalg.norm(b), 1e-12)
+    images = x.T.reshape(batch, size, size)
+    stats = {
+        "iterations": iteration,
+        "seconds": time.perf_counter() - start,
+        "converged": converged,
+        "relative_change": history,
+        "relative_residual": float(residual),
+    }
+    return (images if batched else images[0]), stats
+
+
+def prepare_tv_operator(theta: np.ndarray, size: int, n_detectors: int) -> None:
+    """Build (or fetch from cache) the projector used by tv_reconstruction ahead of time"""
+    _projection_operator(size, n_detectors, tuple(np.asarray(theta, dtype=float)))
+
+
+def preprocess_sinogram(sinogram: np.ndarray, preset: str = DEFAULT_PREPROCESS) -> np.ndarray:
+    """Apply a preprocessing preset to a sinogram or a (batch, detector, angle) stack"""
+    if preset not in PREPROCESS_PRESETS:
+        raise ValueError(f"Unknown preprocessing preset: {preset}")
+
+    for step in PREPROCESS_PRESETS[preset]:
+        sinogram = SINOGRAM_FILTERS[step](sinogram)
+    return sinogram
+
+
 ###################################################################################
 
 
+def _support_median(values: np.ndarray, support: np.ndarray) -> np.ndarray:
+    """Per-sinogram median restricted to the support mask, keeps the (detector, angle) dims"""
+    masked = np.where(support, values, np.nan)
+    return np.nan_to_num(np.nanmedian(masked, axis=(-2, -1), keepdims=True))
+
+
+def _noise_std(sinogram: np.ndarray, support: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Robust per-sinogram noise estimate from detector-axis second differences on the object
+    support (sinogram > 0 unless given, pass it explicitly for transformed sinograms)
+    """
+    if support is None:
+        support = sinogram > 0
+    second_diff = sinogram[..., 2:, :] - 2 * sinogram[..., 1:-1, :] + sinogram[..., :-2, :]
+    support = support[..., 1:-1, :]
+    # Second differences of white noise have variance 6 sigma^2
+    return 1.4826 * _support_median(np.abs(second_diff), support) / np.sqrt(6)
+
+
+def _anscombe(sinogram: np.ndarray) -> np.ndarray:
+    """
+    Anscombe transform. Sinograms are line integrals rather than photon counts, so this
+    only compresses the dynamic range; it does not make the noise std ~1.
+    """
+    return 2.0 * np.sqrt(np.maximum(sinogram, 0.0) + 3.0 / 8.0)
+
+
+def _inverse_anscombe(transformed: np.ndarray) -> np.ndarray:
+    """Algebraic inverse of the Anscombe transform"""
+    return (transformed / 2.0) ** 2 - 3.0 / 8.0
+
+
+def _gaussian_detector(sinogram: np.ndarray, sigma: float = DETECTOR_SIGMA) -> np.ndarray:
+    """Gaussian smoothing along the detector axis only"""
+    return gaussian_filter1d(sinogram, sigma, axis=-2, mode='nearest')
+
+
+def _bilateral_detector(sinogram: np.ndarray, sigma: float = DETECTOR_SIGMA,
+                        range_factor: float = BILATERAL_RANGE_FACTOR,
+                        noise_std: Optional[np.ndarray] = None) -> np.ndarray:
+    """Edge-preserving bilateral smoothing along the detector axis, range sigma from measured noise"""
+    if noise_std is None:
+        noise_std = _noise_std(sinogram)
+    range_sigma = np.maximum(range_factor * noise_std, 1e-12)
+    radius = int(np.ceil(3 * sigma))
+    n = sinogram.shape[-2]
+    pad = [(0, 0)] * sinogram.ndim
+    pad[-2] = (radius, radius)
+    padded = np.pad(sinogram, pad, mode='edge')
+
+    weighted = np.zeros_like(sinogram, dtype=np.float64)
+    norm = np.zeros_like(sinogram, dtype=np.float64)
+    for offset in range(-radius, radius + 1):
+        shifted = padded[..., radius + offset:radius + offset + n, :]
+        weight = np.exp(-offset**2 / (2 * sigma**2)
+                        - (shifted - sinogram)**2 / (2 * range_sigma**2))
+        weighted += weight * shifted
+        norm += weight
+    return weighted / norm
+
+
+def _anscombe_gaussian(sinogram: np.ndarray) -> np.ndarray:
+    return _inverse_anscombe(_gaussian_detector(_anscombe(sinogram)))
+
+
+def _anscombe_bilateral(sinogram: np.ndarray) -> np.ndarray:
+    # The support must come from the raw sinogram, the transform maps zeros to ~1.22
+    transformed = _anscombe(sinogram)
+    noise_std = _noise_std(transformed, support=sinogram > 0)
+    return _inverse_anscombe(_bilateral_detector(transformed, noise_std=noise_std))
+
+
+def _remove_rings(sinogram: np.ndarray, size: int = RING_FILTER_SIZE) -> np.ndarray:
+    """Remove detector stripes (rings in the image) using the median profile along angles"""
+    profile = np.median(sinogram, axis=-1, keepdims=True)
+    filter_size = (1,) * (sinogram.ndim - 2) + (size, 1)
+    smooth_profile = median_filter(profile, size=filter_size, mode='nearest')
+    return sinogram - (profile - smooth_profile)
+
+
+def _clip_outliers(sinogram: np.ndarray, size: int = OUTLIER_FILTER_SIZE,
+                   threshold: float = OUTLIER_THRESHOLD,
+                   relative_floor: float = OUTLIER_RELATIVE_FLOOR) -> np.ndarray:
+    """Replace isolated spikes (dead/hot detector readings) by their median along the detector"""
+    filter_size = (1,) * (sinogram.ndim - 2) + (size, 1)  # Detector axis, angular edges are real
+    local_median = median_filter(sinogram, size=filter_size, mode='nearest')
+    residual = sinogram - local_median
+
+    # Noise scale over the object support only, zero padding would collapse the MAD
+    mad = _support_median(np.abs(residual), sinogram > 0)
+    peak = np.abs(sinogram).max(axis=(-2, -1), keepdims=True)
+    limit = np.maximum(threshold * 1.4826 * mad, relative_floor * peak)
+    return np.where(np.abs(residual) > limit, local_median, sinogram)
+
+
+SINOGRAM_FILTERS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "clip_outliers": _clip_outliers,
+    "remove_rings": _remove_rings,
+    "gaussian": _gaussian_detector,
+    "anscombe_gaussian": _anscombe_gaussian,
+    "anscombe_bilateral": _anscombe_bilateral,
+}
+
+PREPROCESS_PRESETS: Dict[str, List[str]] = {
+    "none": [],
+    "denoise": ["clip_outliers", "remove_rings", "anscombe_gaussian"],
+    "denoise_edges": ["clip_outliers", "remove_rings", "anscombe_bilateral"],
+    "rings": ["remove_rings"],
+}
+
+
+###################################################################################
+
+
+@lru_cache(maxsize=TV_OPERATOR_CACHE_SIZE)
+def _projection_operator(size: int, n_detectors: int, theta: Tuple[float, ...]):
+    """
+    Sparse pixel-driven projector A (matching skimage radon/iradon geometry), its transpose
+    and the diagonal Chambolle-Pock preconditioners for K = [A; grad].
+    """
+    n_angles = len(theta)
+    center = size // 2
+    rows, cols = np.mgrid[:size, :size] - center
+    theta_rad = np.deg2rad(np.asarray(theta))
+
+    # Detector position of every pixel at every angle, shape (pixels, angles)
+    detector_pos = (np.outer(cols.ravel(), np.cos(theta_rad))
+                    - np.outer(rows.ravel(), np.sin(theta_rad)) + n_detectors // 2)
+    lower = np.floor(detector_pos).astype(np.int64)
+    frac = (detector_pos - lower).astype(np.float32)
+
+    # Linear interpolation between the two neighbouring detector bins
+    bins = np.stack([lower, lower + 1], axis=-1)
+    weights = np.stack([1 - frac, frac], axis=-1)
+    outside = (bins < 0) | (bins >= n_detectors)
+    weights[outside] = 0
+    bins = np.clip(bins, 0, n_detectors - 1)
+
+    # Sinograms are flattened (detector, angle) in C order
+    indices = (bins * n_angles + np.arange(n_angles)[None, :, None]).ravel().astype(np.int32)
+    entries_per_pixel = 2 * n_angles
+    indptr = np.arange(0, size * size * entries_per_pixel + 1, entries_per_pixel, dtype=np.int64)
+    backward = csr_matrix((weights.ravel(), indices, indptr),
+                          shape=(size * size, n_detectors * n_angles))
+    forward = backward.T.tocsr()
+
+    row_sums = np.asarray(forward.sum(axis=1)).ravel()
+    col_sums = np.asarray(backward.sum(axis=1)).ravel()
+    sigma = (1 / np.maximum(row_sums, 1e-6)).astype(np.float32)[:, None]
+    tau = (1 / (col_sums + 4)).astype(np.float32)[:, None]  # Gradient adds |1| four times
+    return forward, backward, sigma, tau
+
+
+def _gradient(x: np.ndarray, size: int) -> np.ndarray:
+    """Forward-difference gradient of (pixels, batch) images, returns (2, pixels, batch)"""
+    image = x.reshape(size, size, -1)
+    grad = np.zeros((2,) + image.shape, dtype=x.dtype)
+    grad[0, :-1] = image[1:] - image[:-1]
+    grad[1, :, :-1] = image[:, 1:] - image[:, :-1]
+    return grad.reshape(2, size * size, -1)
+
+
+def _divergence_adjoint(q: np.ndarray, size: int) -> np.ndarray:
+    """Adjoint of _gradient (i.e. minus the divergence), returns (pixels, batch)"""
+    grad = q.reshape(2, size, size, -1)
+    out = np.zeros(grad.shape[1:], dtype=q.dtype)
+    out[:-1] -= grad[0, :-1]
+    out[1:] += grad[0, :-1]
+    out[:, :-1] -= grad[1, :, :-1]
+    out[:, 1:] += grad[1, :, :-1]
+    return out.reshape(size * size, -1)
+
+
 def _radon_custom(image: np.ndarray, theta: np.ndarray) -> np.ndarray:
     """Custom Radon transform implementation"""
     sinogram = np.zeros((image.shape[1], len(theta)))
@@ -1,8 +1,9 @@
 import os
 import numpy as np
-from typing import Optional
-from constants import HOUNSFIELD_AIR, HOUNSFIELD_BONE
+from typing import Optional, Tuple
+from constants import HOUNSFIELD_AIR, HOUNSFIELD_BONE, ATTENUATION_SCALE
 from dicom_io import save_phantom_dicom
+from radon_transform import compute_sinogram
 
 ###################################################################################
 
@@ -64,6 +65,34 @@ def generate_dataset(output_dir: str, num_samples: int, size: int, noise_level:
 ###################################################################################
 
 
+def acquisition_theta(num_angles: int, angular_range: float = 180.0) -> np.ndarray:
+    """Projection angles (degrees) for a sparse and/or limited-angle acquisition"""
+    return np.linspace(0, angular_range, num_angles, endpoint=False)
+
+
+def add_poisson_noise(sinogram: np.ndarray, photon_count: float,
+                      attenuation_scale: float = ATTENUATION_SCALE,
+                      seed: Optional[int] = None) -> np.ndarray:
+    """Add photon-count (Beer-Lambert + Poisson) noise directly in projection space"""
+    rng = np.random.default_rng(seed)
+    expected = photon_count * np.exp(-attenuation_scale * sinogram)
+    counts = np.maximum(rng.poisson(expected), 1)  # Avoid log(0) on photon starvation
+    return -np.log(counts / photon_count) / attenuation_scale
+
+
+def simulate_acquisition(image: np.ndarray, num_angles: int, angular_range: float = 180.0,
+                         photon_count: Optional[float] = None,
+                         seed: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Simulate a CT acquisition, returns the (optionally noisy) sinogram and its angles"""
+    theta = acquisition_theta(num_angles, angular_range)
+    sinogram = compute_sinogram(image, theta)
+    if photon_count is not None:
+        sinogram = add_poisson_noise(sinogram, photon_count, seed=seed)
+    return sinogram, theta
+
+###################################################################################
+
+
 def normalize_to_hu(phantom: np.ndarray) -> np.ndarray:
     """Convert normalized [0,1] values to simulated Hounsfield Units"""
     return phantom * (HOUNSFIELD_BONE - HOUNSFIELD_AIR) + HOUNSFIELD_AIR